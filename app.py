@@ -1,18 +1,47 @@
 import os
-import json
+import sys
 import logging
-from logging.handlers import RotatingFileHandler
-from flask import Flask, render_template, request, jsonify, session, send_from_directory
+import queue
+import atexit
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
+from flask import Flask, Response, render_template, request, jsonify, session, send_from_directory, stream_with_context
+from flask.json.provider import DefaultJSONProvider
 from dotenv import load_dotenv
 from datetime import datetime
 import uuid
+import time
 import threading
+import tempfile
+import heapq
 import re
+from functools import lru_cache
+from types import MappingProxyType
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
 import groq
+import httpx
+import orjson
+import redis
+import tiktoken
 
 load_dotenv()
 
+class ORJSONProvider(DefaultJSONProvider):
+    # Flask siempre pasa separators/indent (jsonify, sesión): se traducen a opciones de orjson.
+    # Solo los hooks que orjson no admite (object_hook, cls...) pasan por el json estándar.
+    def dumps(self, obj, **kwargs):
+        if kwargs.keys() - {'separators', 'indent'}:
+            return super().dumps(obj, **kwargs)
+        opciones = orjson.OPT_INDENT_2 if kwargs.get('indent') else 0
+        return orjson.dumps(obj, default=self.default, option=opciones).decode()
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
 app = Flask(__name__)
+app.json = ORJSONProvider(app)
 app.secret_key = os.getenv("FLASK_SECRET_KEY", "cyber-dev-key-2024-render")
 app.config['PERMANENT_SESSION_LIFETIME'] = 3600
 
@@ -28,11 +57,26 @@ if 'RENDER' in os.environ:
     app.config['PREFERRED_URL_SCHEME'] = 'https'
     app.config['SERVER_NAME'] = os.environ.get('RENDER_EXTERNAL_HOSTNAME')
 
-if not os.path.exists('logs'):
-    os.makedirs('logs')
-handler = RotatingFileHandler('logs/app.log', maxBytes=10000, backupCount=3)
-handler.setLevel(logging.INFO)
-app.logger.addHandler(handler)
+LOGS_EN_ARCHIVO = 'RENDER' not in os.environ
+cola_logs = queue.SimpleQueue()
+log_listener = None
+
+def iniciar_listener_logs():
+    listener = QueueListener(cola_logs, handler, respect_handler_level=True)
+    listener.start()
+    return listener
+
+def detener_listener_logs():
+    if log_listener is not None:
+        log_listener.stop()
+
+if LOGS_EN_ARCHIVO:
+    os.makedirs('logs', exist_ok=True)
+    handler = RotatingFileHandler('logs/app.log', maxBytes=10 * 1024 * 1024, backupCount=3)
+    handler.setLevel(logging.INFO)
+    log_listener = iniciar_listener_logs()
+    atexit.register(detener_listener_logs)
+    app.logger.addHandler(QueueHandler(cola_logs))
 logging.basicConfig(level=logging.INFO)
 app.logger.setLevel(logging.INFO)
 
@@ -41,8 +85,27 @@ if 'RENDER' in os.environ:
     app.logger.info(f"📁 Directorio actual: {os.getcwd()}")
     app.logger.info(f"📁 Archivos: {os.listdir('.')}")
 
+def crear_cliente_groq():
+    http_client = httpx.Client(
+        timeout=45.0,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+        http2=True
+    )
+    return groq.Groq(api_key=os.getenv("GROQ_API_KEY"), http_client=http_client)
+
+def iniciar_worker():
+    global client, log_listener
+    if LOGS_EN_ARCHIVO:
+        log_listener = iniciar_listener_logs()
+    if GROQ_AVAILABLE:
+        client = crear_cliente_groq()
+    # Los hilos no sobreviven al fork: si el master no terminó de cargar el codificador, se reintenta
+    iniciar_carga_codificador()
+    # Un worker reemplazado hereda el estado que el master cargó al importar: se relee del disco
+    sistema_aprendizaje.cargar_aprendizaje()
+
 try:
-    client = groq.Groq(api_key=os.getenv("GROQ_API_KEY"))
+    client = crear_cliente_groq()
     GROQ_AVAILABLE = True
     app.logger.info("✅ Groq client initialized successfully")
 except Exception as e:
@@ -55,60 +118,164 @@ class SistemaAprendizaje:
         self.respuestas_efectivas = {}
         self.patrones_conversacion = {}
         self.archivo_aprendizaje = "datos/aprendizaje.json"
+        self.archivo_registro = "datos/aprendizaje.log"
+        self.archivo_registro_anterior = "datos/aprendizaje.log.1"
+        self.max_registros = 1000
+        self.max_respuestas_por_lenguaje = 500
         self.lock = threading.Lock()
+        self.registro = None
+        self.registros_pendientes = 0
+        self.generacion = 0
+        self.compactando = False
         self.cargar_aprendizaje()
     def cargar_aprendizaje(self):
         try:
             with self.lock:
+                if self.registro is not None:
+                    self.registro.close()
+                    self.registro = None
+                self.respuestas_efectivas = {}
+                self.patrones_conversacion = {}
+                self.generacion = 0
+                self.registros_pendientes = 0
                 if os.path.exists(self.archivo_aprendizaje):
-                    with open(self.archivo_aprendizaje, 'r', encoding='utf-8') as f:
-                        datos = json.load(f)
-                        self.respuestas_efectivas = datos.get('respuestas_efectivas', {})
+                    with open(self.archivo_aprendizaje, 'rb') as f:
+                        datos = orjson.loads(f.read())
+                        respuestas_efectivas = datos.get('respuestas_efectivas', {})
+                        for respuestas in respuestas_efectivas.values():
+                            for stats in respuestas.values():
+                                if isinstance(stats.get('ultimo_uso'), str):
+                                    stats['ultimo_uso'] = datetime.fromisoformat(stats['ultimo_uso']).timestamp()
+                                if 'score' not in stats:
+                                    stats['score'] = stats['efectividad_total'] / stats['veces_usada'] if stats['veces_usada'] > 0 else 0
+                        self.respuestas_efectivas = respuestas_efectivas
                         self.patrones_conversacion = datos.get('patrones_conversacion', {})
+                        self.generacion = datos.get('generacion', 0)
+                self.reproducir_registro(self.archivo_registro_anterior)
+                self.reproducir_registro(self.archivo_registro)
         except Exception as e:
             app.logger.error(f"Error cargando aprendizaje: {e}")
+    def reproducir_registro(self, ruta):
+        # Se llama con self.lock tomado
+        if not os.path.exists(ruta):
+            return
+        with open(ruta, 'rb') as f:
+            for linea in f:
+                try:
+                    delta = orjson.loads(linea)
+                except orjson.JSONDecodeError:
+                    continue
+                # Registros anteriores a la última compactación ya están en el snapshot
+                if delta.get('g', 0) < self.generacion:
+                    continue
+                self.aplicar_delta(delta['lenguaje'], delta['respuesta_bot'], delta['efectividad'], delta['ultimo_uso'])
+                self.registros_pendientes += 1
+    def rotar_registro(self):
+        # Se llama con self.lock tomado
+        if self.registro is not None:
+            self.registro.close()
+            self.registro = None
+        if not os.path.exists(self.archivo_registro):
+            return
+        if os.path.exists(self.archivo_registro_anterior):
+            # Una compactación previa falló: conservar ambos registros
+            with open(self.archivo_registro, 'rb') as origen, open(self.archivo_registro_anterior, 'ab') as destino:
+                destino.write(origen.read())
+            os.remove(self.archivo_registro)
+        else:
+            os.replace(self.archivo_registro, self.archivo_registro_anterior)
     def guardar_aprendizaje(self):
         try:
+            # Bajo el lock solo se toma la referencia al snapshot inmutable y se rota el registro;
+            # la serialización y escritura ocurren fuera para no bloquear a evaluar_respuesta
             with self.lock:
-                os.makedirs(os.path.dirname(self.archivo_aprendizaje), exist_ok=True)
-                with open(self.archivo_aprendizaje, 'w', encoding='utf-8') as f:
-                    json.dump({
-                        'respuestas_efectivas': self.respuestas_efectivas,
-                        'patrones_conversacion': self.patrones_conversacion
-                    }, f, ensure_ascii=False, indent=2)
+                respuestas_efectivas = self.respuestas_efectivas
+                patrones_conversacion = self.patrones_conversacion
+                self.rotar_registro()
+                self.generacion += 1
+                generacion = self.generacion
+                self.registros_pendientes = 0
+            directorio = os.path.dirname(self.archivo_aprendizaje)
+            os.makedirs(directorio, exist_ok=True)
+            fd, ruta_temporal = tempfile.mkstemp(dir=directorio, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(orjson.dumps({
+                    'respuestas_efectivas': respuestas_efectivas,
+                    'patrones_conversacion': patrones_conversacion,
+                    'generacion': generacion
+                }))
+            os.replace(ruta_temporal, self.archivo_aprendizaje)
+            if os.path.exists(self.archivo_registro_anterior):
+                os.remove(self.archivo_registro_anterior)
         except Exception as e:
             app.logger.error(f"Error guardando aprendizaje: {e}")
+        finally:
+            self.compactando = False
+    def registrar_delta(self, delta):
+        # Se llama con self.lock tomado; escritura O(1) sin reescribir el snapshot
+        if self.registro is None:
+            os.makedirs(os.path.dirname(self.archivo_registro), exist_ok=True)
+            self.registro = open(self.archivo_registro, 'ab', buffering=0)
+        self.registro.write(orjson.dumps(delta) + b'\n')
+        self.registros_pendientes += 1
+        if self.registros_pendientes > self.max_registros and not self.compactando:
+            self.compactando = True
+            threading.Thread(target=self.guardar_aprendizaje, daemon=True).start()
+    def aplicar_delta(self, lenguaje, respuesta_bot, efectividad, ahora):
+        # Se llama con self.lock tomado
+        respuestas = dict(self.respuestas_efectivas.get(lenguaje, {}))
+        stats = respuestas.get(respuesta_bot, {'efectividad_total': 0, 'veces_usada': 0})
+        efectividad_total = stats['efectividad_total'] + efectividad
+        veces_usada = stats['veces_usada'] + 1
+        respuestas[respuesta_bot] = {
+            'efectividad_total': efectividad_total,
+            'veces_usada': veces_usada,
+            'score': efectividad_total / veces_usada,
+            'ultimo_uso': ahora
+        }
+        exceso = len(respuestas) - self.max_respuestas_por_lenguaje
+        if exceso > 0:
+            candidatas = (respuesta for respuesta in respuestas if respuesta != respuesta_bot)
+            for respuesta in heapq.nsmallest(exceso, candidatas, key=lambda r: (respuestas[r]['score'], respuestas[r]['ultimo_uso'])):
+                del respuestas[respuesta]
+        snapshot = dict(self.respuestas_efectivas)
+        snapshot[lenguaje] = respuestas
+        self.respuestas_efectivas = snapshot
     def evaluar_respuesta(self, lenguaje, respuesta_usuario, respuesta_bot, engagement):
         if not isinstance(lenguaje, str) or not lenguaje.strip():
             return
         if not isinstance(respuesta_bot, str) or not respuesta_bot.strip():
             return
         efectividad = min(10, max(1, engagement))
-        if lenguaje not in self.respuestas_efectivas:
-            self.respuestas_efectivas[lenguaje] = {}
-        if respuesta_bot not in self.respuestas_efectivas[lenguaje]:
-            self.respuestas_efectivas[lenguaje][respuesta_bot] = {
-                'efectividad_total': 0,
-                'veces_usada': 0,
-                'ultimo_uso': datetime.now().isoformat()
-            }
-        self.respuestas_efectivas[lenguaje][respuesta_bot]['efectividad_total'] += efectividad
-        self.respuestas_efectivas[lenguaje][respuesta_bot]['veces_usada'] += 1
-        self.respuestas_efectivas[lenguaje][respuesta_bot]['ultimo_uso'] = datetime.now().isoformat()
-        self.guardar_aprendizaje()
+        ahora = time.time()
+        with self.lock:
+            self.aplicar_delta(lenguaje, respuesta_bot, efectividad, ahora)
+            try:
+                self.registrar_delta({
+                    'lenguaje': lenguaje,
+                    'respuesta_bot': respuesta_bot,
+                    'efectividad': efectividad,
+                    'ultimo_uso': ahora,
+                    'g': self.generacion
+                })
+            except Exception as e:
+                app.logger.error(f"Error registrando aprendizaje: {e}")
     def obtener_mejor_respuesta(self, lenguaje, contexto):
-        if lenguaje in self.respuestas_efectivas and self.respuestas_efectivas[lenguaje]:
-            respuestas_ordenadas = sorted(
-                self.respuestas_efectivas[lenguaje].items(),
-                key=lambda x: x[1]['efectividad_total'] / x[1]['veces_usada'] if x[1]['veces_usada'] > 0 else 0,
-                reverse=True
+        respuestas = self.respuestas_efectivas.get(lenguaje)
+        if respuestas:
+            mejores_respuestas = heapq.nlargest(
+                3,
+                respuestas.items(),
+                key=lambda x: x[1]['score']
             )
-            for respuesta, stats in respuestas_ordenadas[:3]:
-                ultimo_uso = datetime.fromisoformat(stats['ultimo_uso'])
-                if (datetime.now() - ultimo_uso).total_seconds() > 3600:
+            ahora = time.time()
+            for respuesta, stats in mejores_respuestas:
+                if ahora - stats['ultimo_uso'] > 3600:
                     return respuesta
         return None
 
+sistema_aprendizaje = SistemaAprendizaje()
+
 lenguajes_disponibles = [
     "Python", "JavaScript", "Java", "C++", "C#", "PHP", "Ruby", "Go", "Rust",
     "TypeScript", "Swift", "Kotlin", "HTML/CSS", "React", "Vue.js", "Angular",
@@ -116,64 +283,248 @@ lenguajes_disponibles = [
     "SQL", "MongoDB", "PostgreSQL", "MySQL", "Firebase", "AWS", "Docker", "Kubernetes"
 ]
 
+LENGUAJES_KEYWORDS = MappingProxyType({
+    "Python": ("python", "def ", "import ", "print(", "numpy", "pandas", "__main__", "if __name__"),
+    "JavaScript": ("javascript", "js", "function()", "console.log", "react", "vue", "angular", "document.", "window."),
+    "Java": ("java", "public class", "System.out", "spring", "void main", "String[]", "import java"),
+    "HTML/CSS": ("html", "css", "<div>", "class=", "style=", "<html", "<body", "color:", "font-size"),
+    "React": ("react", "useState", "component", "jsx", "useEffect", "props", "setState"),
+    "Node.js": ("node", "express", "require(", "npm", "module.exports", "app.get", "app.post"),
+    "SQL": ("sql", "select", "insert", "update", "delete", "where", "from", "join", "table"),
+    "C++": ("c++", "#include", "cout <<", "cin >>", "std::", "vector<", "class "),
+    "TypeScript": ("typescript", "ts", "interface", "type ", "const:", "function(")
+})
+
+# Un patrón por lenguaje, probado en el orden de LENGUAJES_KEYWORDS: el orden es la prioridad
+PATRONES_LENGUAJES = MappingProxyType({
+    lenguaje: re.compile('|'.join(re.escape(keyword) for keyword in keywords), re.IGNORECASE)
+    for lenguaje, keywords in LENGUAJES_KEYWORDS.items()
+})
+
+PATRON_BLOQUE_CODIGO = re.compile(r'```(?:\w+)?\n(.*?)```', re.DOTALL)
+PATRON_CODIGO_INLINE = re.compile(r'`([^`]+)`')
+PALABRAS_CODIGO = ('def ', 'function', 'class ', 'import ', 'var ', 'let ', 'const ', 'if ', 'for ', 'while ', 'return ', 'print', 'console.log')
+PATRON_LINEA_CODIGO = re.compile(
+    r'^.*(?:' + '|'.join(re.escape(palabra) for palabra in PALABRAS_CODIGO) + r').*$',
+    re.MULTILINE
+)
+
+MEJORES_PRACTICAS = MappingProxyType({
+    "Python": """• Usa type hints para mejor legibilidad\n• Aplica el principio DRY (Don't Repeat Yourself)\n• Usa context managers (with) para manejo de recursos\n• Sigue PEP 8 para estilo de código\n• Escribe docstrings para documentación\n• Usa virtual environments para dependencias\n• Implementa manejo de excepciones específico""",
+    "JavaScript": """• Usa const/let en lugar de var\n• Implementa async/await para operaciones asíncronas\n• Usa arrow functions para callbacks\n• Aplica destructuring para objetos/arrays\n• Usa template literals para strings\n• Sigue ESLint para consistencia\n• Implementa error handling con try/catch""",
+    "Java": """• Sigue convenciones de nombrado Java\n• Usa streams para procesamiento de datos\n• Implementa optional para valores nulos\n• Aplica principios SOLID\n• Usa Lombok para reducir boilerplate\n• Implementa logging apropiado\n• Usa constructores para inmutabilidad""",
+    "React": """• Usa functional components con hooks\n• Implementa useEffect correctamente\n• Aplica propTypes o TypeScript\n• Usa context API para estado global\n• Optimiza con React.memo y useMemo\n• Separa concerns con custom hooks\n• Implementa error boundaries"""
+})
+MEJORES_PRACTICAS_GENERALES = "• Escribe código limpio y legible\n• Usa nombres descriptivos\n• Comenta cuando sea necesario\n• Prueba tu código\n• Sigue las convenciones del lenguaje"
+
+SYSTEM_PROMPT = "Eres CyberCode AI, un experto asistente de programación especializado en {especialidad}..."
+
+def construir_mensaje_sistema(lenguaje):
+    especialidad = lenguaje if lenguaje != 'General' else 'múltiples lenguajes'
+    return {"role": "system", "content": SYSTEM_PROMPT.format(especialidad=especialidad)}
+
+MENSAJES_SISTEMA = {lenguaje: construir_mensaje_sistema(lenguaje) for lenguaje in [*LENGUAJES_KEYWORDS, "General"]}
+
+@lru_cache(maxsize=None)
+def construir_pie(lenguaje):
+    # Solo depende del lenguaje: se arma una vez por lenguaje
+    partes = ["\n\n"]
+    mejores_practicas = MEJORES_PRACTICAS.get(lenguaje, MEJORES_PRACTICAS_GENERALES)
+    if mejores_practicas:
+        partes.append(f"""**📚 MEJORES PRÁCTICAS - {lenguaje.upper()}**\n{mejores_practicas}\n\n""")
+    partes.append("""**¿Necesitas más ayuda?** \nPuedo:\n• 🔍 Analizar código más complejo\n• 💡 Explicar conceptos específicos\n• ⚡ Optimizar rendimiento\n• 🐛 Debuggear errores\n• 📚 Mostrar ejemplos avanzados\n\n¡Solo pregúntame! 🚀""")
+    return ''.join(partes)
+
+MODELOS = ("openai/gpt-oss-120b", "llama-3.3-70b-versatile", "llama-3.1-8b-instant")
+COOLDOWN_MODELO = 60
+estado_modelo = {"preferido": MODELOS[0], "desde": 0}
+estado_modelo_lock = threading.Lock()
+
+def modelos_candidatos():
+    with estado_modelo_lock:
+        preferido = estado_modelo["preferido"]
+        if preferido != MODELOS[0] and time.time() - estado_modelo["desde"] >= COOLDOWN_MODELO:
+            preferido = estado_modelo["preferido"] = MODELOS[0]
+    return (preferido, *(modelo for modelo in MODELOS if modelo != preferido))
+
+def registrar_modelo_exitoso(modelo):
+    with estado_modelo_lock:
+        if estado_modelo["preferido"] == modelo:
+            return
+        estado_modelo["preferido"] = modelo
+        estado_modelo["desde"] = time.time()
+    app.logger.warning(f"🔀 Usando {modelo} como modelo preferido durante {COOLDOWN_MODELO}s")
+
+ejecutor_modelos = ThreadPoolExecutor(max_workers=16, thread_name_prefix="modelo")
+
+def descartar_respuesta(futuro):
+    # Las respuestas que pierden la carrera se cierran para liberar la conexión del stream
+    if futuro.cancelled() or futuro.exception() is not None:
+        return
+    cerrar = getattr(futuro.result(), "close", None)
+    if cerrar is not None:
+        cerrar()
+
+def solicitar_completion(messages, **kwargs):
+    preferido, *alternativos = modelos_candidatos()
+    try:
+        response = client.chat.completions.create(model=preferido, messages=messages, **kwargs)
+    except Exception as e:
+        app.logger.warning(f"Modelo {preferido} falló: {e}")
+        ultimo_error = e
+    else:
+        registrar_modelo_exitoso(preferido)
+        return preferido, response
+    # El preferido falló: los alternativos compiten en paralelo y gana la primera respuesta válida
+    futuros = {
+        ejecutor_modelos.submit(client.chat.completions.create, model=modelo, messages=messages, **kwargs): modelo
+        for modelo in alternativos
+    }
+    pendientes = set(futuros)
+    ganador = None
+    while pendientes and ganador is None:
+        terminados, pendientes = wait(pendientes, return_when=FIRST_COMPLETED)
+        for futuro in terminados:
+            error = futuro.exception()
+            if error is not None:
+                app.logger.warning(f"Modelo {futuros[futuro]} falló: {error}")
+                ultimo_error = error
+            elif ganador is None:
+                ganador = futuro
+            else:
+                descartar_respuesta(futuro)
+    for futuro in pendientes:
+        futuro.cancel()
+        futuro.add_done_callback(descartar_respuesta)
+    if ganador is None:
+        raise ultimo_error
+    modelo = futuros[ganador]
+    registrar_modelo_exitoso(modelo)
+    return modelo, ganador.result()
+
+MODELO_RESUMEN = "llama-3.1-8b-instant"
+MENSAJES_POR_RESUMEN = 5
+MAX_CARACTERES_RESUMEN = 2000
+PROMPT_RESUMEN = "Resume esta conversación en 150 tokens como máximo, conservando los objetivos del usuario y las decisiones tomadas."
+
+MAX_HISTORIAL = 20
+MAX_TOKENS_CONTEXTO = 3000
+
+codificador_tokens = None
+
+def cargar_codificador_tokens():
+    # get_encoding descarga el BPE la primera vez (sin timeout): se hace en segundo plano
+    # y mientras tanto contar_tokens usa la estimación por caracteres
+    global codificador_tokens
+    try:
+        codificador_tokens = tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        app.logger.warning(f"⚠️ tiktoken no disponible, se estimarán los tokens: {e}")
+
+def iniciar_carga_codificador():
+    if codificador_tokens is None:
+        threading.Thread(target=cargar_codificador_tokens, daemon=True).start()
+
+iniciar_carga_codificador()
+
+def contar_tokens(texto):
+    if codificador_tokens is None:
+        return len(texto) // 4 + 1
+    return len(codificador_tokens.encode(texto, disallowed_special=()))
+
+def evento_sse(datos):
+    return b"data: " + orjson.dumps(datos) + b"\n\n"
+
+@dataclass(slots=True)
 class CodeChatAssistant:
-    def __init__(self):
-        self.history = []
-        self.session_id = str(uuid.uuid4())
-        self.contador_interacciones = 0
-        self.max_historial = 20
-        self.sistema_aprendizaje = SistemaAprendizaje()
-        self.lenguaje_actual = None
+    session_id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    history: deque = field(default_factory=lambda: deque(maxlen=MAX_HISTORIAL))
+    # Ventana enviada al modelo y su conteo de tokens en paralelo, para no re-tokenizar en cada turno
+    llm_history: deque = field(default_factory=deque)
+    tokens_historial: deque = field(default_factory=deque)
+    resumen: str = ""
+    pendientes_resumen: list = field(default_factory=list)
+    contador_interacciones: int = 0
+    lenguaje_actual: str | None = None
+    # Un turno a la vez por conversación: las peticiones comparten el mismo objeto
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
     def add_message(self, role, content, code_snippet=None):
         self.history.append({"role": role, "content": content, "code_snippet": code_snippet})
+        self.llm_history.append({"role": role, "content": content})
+        self.tokens_historial.append(contar_tokens(content))
         self.contador_interacciones += 1
+        self.ajustar_ventana()
+    def ajustar_ventana(self):
+        # Lo que sale de la ventana, por número de mensajes o por presupuesto de tokens,
+        # pasa a pendientes_resumen en vez de perderse. El mensaje más reciente siempre se conserva.
+        tokens_contexto = sum(self.tokens_historial)
+        while len(self.llm_history) > 1 and (len(self.llm_history) > MAX_HISTORIAL or tokens_contexto > MAX_TOKENS_CONTEXTO):
+            tokens_contexto -= self.tokens_historial.popleft()
+            self.pendientes_resumen.append(self.llm_history.popleft())
     def get_conversation_context(self):
-        return self.history[-self.max_historial:]
+        return list(self.llm_history)
+    def actualizar_resumen(self):
+        conversacion = '\n'.join(f"{msg['role']}: {msg['content'][:MAX_CARACTERES_RESUMEN]}" for msg in self.pendientes_resumen)
+        if self.resumen:
+            conversacion = f"Resumen previo: {self.resumen}\n\n{conversacion}"
+        try:
+            response = client.chat.completions.create(
+                model=MODELO_RESUMEN,
+                messages=[{"role": "system", "content": PROMPT_RESUMEN}, {"role": "user", "content": conversacion}],
+                temperature=0.3,
+                max_tokens=200
+            )
+            self.resumen = response.choices[0].message.content.strip()
+            self.pendientes_resumen = []
+        except Exception as e:
+            app.logger.warning(f"No se pudo resumir la conversación: {e}")
+            del self.pendientes_resumen[:-MAX_HISTORIAL]
     def to_dict(self):
         return {
-            "history": self.history,
+            "history": list(self.history),
             "session_id": self.session_id,
             "contador_interacciones": self.contador_interacciones,
-            "max_historial": self.max_historial,
-            "lenguaje_actual": self.lenguaje_actual
+            "resumen": self.resumen,
+            "pendientes_resumen": self.pendientes_resumen,
+            "lenguaje_actual": self.lenguaje_actual,
+            "llm_history": list(self.llm_history),
+            "tokens_historial": list(self.tokens_historial)
         }
     @classmethod
     def from_dict(cls, data):
-        obj = cls()
-        obj.history = data.get("history", [])
-        obj.session_id = data.get("session_id", str(uuid.uuid4()))
-        obj.contador_interacciones = data.get("contador_interacciones", 0)
-        obj.max_historial = data.get("max_historial", 20)
-        obj.lenguaje_actual = data.get("lenguaje_actual", None)
-        return obj
+        history = deque(data.get("history", []), maxlen=MAX_HISTORIAL)
+        llm_history = data.get("llm_history")
+        if llm_history is None:
+            # Sesiones guardadas antes de persistir llm_history: la ventana se rehace desde history
+            llm_history = [{"role": msg["role"], "content": msg["content"]} for msg in history]
+        tokens_historial = data.get("tokens_historial")
+        if tokens_historial is None or len(tokens_historial) != len(llm_history):
+            tokens_historial = [contar_tokens(msg["content"]) for msg in llm_history]
+        asistente = cls(
+            session_id=data.get("session_id") or str(uuid.uuid4()),
+            history=history,
+            llm_history=deque(llm_history),
+            tokens_historial=deque(tokens_historial),
+            resumen=data.get("resumen", ""),
+            pendientes_resumen=data.get("pendientes_resumen", []),
+            contador_interacciones=data.get("contador_interacciones", 0),
+            lenguaje_actual=data.get("lenguaje_actual", None)
+        )
+        asistente.ajustar_ventana()
+        return asistente
     def detectar_lenguaje(self, user_message):
-        lenguajes_keywords = {
-            "Python": ["python", "def ", "import ", "print(", "numpy", "pandas", "__main__", "if __name__"],
-            "JavaScript": ["javascript", "js", "function()", "console.log", "react", "vue", "angular", "document.", "window."],
-            "Java": ["java", "public class", "System.out", "spring", "void main", "String[]", "import java"],
-            "HTML/CSS": ["html", "css", "<div>", "class=", "style=", "<html", "<body", "color:", "font-size"],
-            "React": ["react", "useState", "component", "jsx", "useEffect", "props", "setState"],
-            "Node.js": ["node", "express", "require(", "npm", "module.exports", "app.get", "app.post"],
-            "SQL": ["sql", "select", "insert", "update", "delete", "where", "from", "join", "table"],
-            "C++": ["c++", "#include", "cout <<", "cin >>", "std::", "vector<", "class "],
-            "TypeScript": ["typescript", "ts", "interface", "type ", "const:", "function("]
-        }
-        user_message_lower = user_message.lower()
-        for lenguaje, keywords in lenguajes_keywords.items():
-            for keyword in keywords:
-                if keyword.lower() in user_message_lower:
-                    return lenguaje
+        for lenguaje, patron in PATRONES_LENGUAJES.items():
+            if patron.search(user_message):
+                return lenguaje
         return "General"
     def extraer_codigo_usuario(self, user_message):
-        codigo_bloques = re.findall(r'```(?:\w+)?\n(.*?)```', user_message, re.DOTALL)
-        if codigo_bloques:
-            return codigo_bloques[0].strip()
-        codigo_inline = re.findall(r'`([^`]+)`', user_message)
-        if codigo_inline:
-            return codigo_inline[0]
-        lineas = user_message.split('\n')
-        lineas_codigo = [linea for linea in lineas if any(keyword in linea for keyword in [
-            'def ', 'function', 'class ', 'import ', 'var ', 'let ', 'const ', 'if ', 'for ', 'while ', 'return ', 'print', 'console.log'])]
+        bloque = PATRON_BLOQUE_CODIGO.search(user_message)
+        if bloque:
+            return bloque.group(1).strip()
+        inline = PATRON_CODIGO_INLINE.search(user_message)
+        if inline:
+            return inline.group(1)
+        lineas_codigo = PATRON_LINEA_CODIGO.findall(user_message)
         if lineas_codigo:
             return '\n'.join(lineas_codigo)
         return user_message
@@ -198,120 +549,259 @@ class CodeChatAssistant:
                 sugerencias.append("Agrega comentarios para explicar los logs de debug")
         return problemas, sugerencias
     def generar_respuesta_estructurada(self, user_message, ai_response_raw, lenguaje):
+        return f"{self.generar_encabezado(user_message, lenguaje)}{ai_response_raw}{self.generar_pie(lenguaje)}"
+    def generar_encabezado(self, user_message, lenguaje):
         codigo_usuario = self.extraer_codigo_usuario(user_message)
         problemas, sugerencias = self.analizar_codigo_estructura(codigo_usuario, lenguaje)
-        respuesta_estructurada = f"""**🤖 CYBERCODE AI - ASISTENTE {lenguaje.upper()}**\n\n"""
+        partes = [f"""**🤖 CYBERCODE AI - ASISTENTE {lenguaje.upper()}**\n\n"""]
         if codigo_usuario and len(codigo_usuario) > 10:
-            respuesta_estructurada += f"""**🔍 ANÁLISIS DEL CÓDIGO**\n\n```{lenguaje.lower()}\n{codigo_usuario}\n``"""
+            partes.append(f"""**🔍 ANÁLISIS DEL CÓDIGO**\n\n```{lenguaje.lower()}\n{codigo_usuario}\n``""")
             if problemas:
-                respuesta_estructurada += "**⚠️ PROBLEMAS IDENTIFICADOS:**\n"
-                for problema in problemas:
-                    respuesta_estructurada += f"• {problema}\n"
-                respuesta_estructurada += "\n"
+                partes.append("**⚠️ PROBLEMAS IDENTIFICADOS:**\n")
+                partes.extend(f"• {problema}\n" for problema in problemas)
+                partes.append("\n")
             if sugerencias:
-                respuesta_estructurada += "**💡 SUGERENCIAS INMEDIATAS:**\n"
-                for sugerencia in sugerencias:
-                    respuesta_estructurada += f"• {sugerencia}\n"
-                respuesta_estructurada += "\n"
-        respuesta_estructurada += f"""**🚀 RESPUESTA ESPECIALIZADA**\n{ai_response_raw}\n\n"""
-        mejores_practicas = self.obtener_mejores_practicas(lenguaje)
-        if mejores_practicas:
-            respuesta_estructurada += f"""**📚 MEJORES PRÁCTICAS - {lenguaje.upper()}**\n{mejores_practicas}\n\n"""
-        respuesta_estructurada += """**¿Necesitas más ayuda?** \nPuedo:\n• 🔍 Analizar código más complejo\n• 💡 Explicar conceptos específicos\n• ⚡ Optimizar rendimiento\n• 🐛 Debuggear errores\n• 📚 Mostrar ejemplos avanzados\n\n¡Solo pregúntame! 🚀"""
-        return respuesta_estructurada
-    def obtener_mejores_practicas(self, lenguaje):
-        practicas = {
-            "Python": """• Usa type hints para mejor legibilidad\n• Aplica el principio DRY (Don't Repeat Yourself)\n• Usa context managers (with) para manejo de recursos\n• Sigue PEP 8 para estilo de código\n• Escribe docstrings para documentación\n• Usa virtual environments para dependencias\n• Implementa manejo de excepciones específico""",
-            "JavaScript": """• Usa const/let en lugar de var\n• Implementa async/await para operaciones asíncronas\n• Usa arrow functions para callbacks\n• Aplica destructuring para objetos/arrays\n• Usa template literals para strings\n• Sigue ESLint para consistencia\n• Implementa error handling con try/catch""",
-            "Java": """• Sigue convenciones de nombrado Java\n• Usa streams para procesamiento de datos\n• Implementa optional para valores nulos\n• Aplica principios SOLID\n• Usa Lombok para reducir boilerplate\n• Implementa logging apropiado\n• Usa constructores para inmutabilidad""",
-            "React": """• Usa functional components con hooks\n• Implementa useEffect correctamente\n• Aplica propTypes o TypeScript\n• Usa context API para estado global\n• Optimiza con React.memo y useMemo\n• Separa concerns con custom hooks\n• Implementa error boundaries"""
+                partes.append("**💡 SUGERENCIAS INMEDIATAS:**\n")
+                partes.extend(f"• {sugerencia}\n" for sugerencia in sugerencias)
+                partes.append("\n")
+        partes.append("""**🚀 RESPUESTA ESPECIALIZADA**\n""")
+        return ''.join(partes)
+    def generar_pie(self, lenguaje):
+        return construir_pie(lenguaje)
+    def preparar_mensajes(self, user_message):
+        lenguaje_detectado = self.detectar_lenguaje(user_message)
+        self.lenguaje_actual = lenguaje_detectado
+        return lenguaje_detectado, self.construir_mensajes(lenguaje_detectado)
+    def construir_mensajes(self, lenguaje_detectado):
+        # Puede llamar al modelo de resumen (bloqueante). Si la ventana quedó por debajo de
+        # MAX_HISTORIAL, fue el presupuesto de tokens el que la recortó: se resume ya
+        if self.pendientes_resumen and (len(self.pendientes_resumen) >= MENSAJES_POR_RESUMEN or len(self.llm_history) < MAX_HISTORIAL):
+            self.actualizar_resumen()
+        messages = [MENSAJES_SISTEMA[lenguaje_detectado]]
+        if self.resumen:
+            messages.append({"role": "system", "content": f"Resumen de la conversación anterior: {self.resumen}"})
+        messages.extend(self.get_conversation_context())
+        return messages
+    def registrar_respuesta(self, user_message, ai_response_mejorada, lenguaje_detectado):
+        self.add_message('assistant', ai_response_mejorada)
+        engagement = min(10, len(user_message) / 10 + 2)
+        sistema_aprendizaje.evaluar_respuesta(lenguaje_detectado, user_message, ai_response_mejorada, engagement)
+        return {
+            "success": True,
+            "response": ai_response_mejorada,
+            "session_id": self.session_id,
+            "lenguaje": lenguaje_detectado,
+            "history_length": len(self.history),
+            "interacciones": self.contador_interacciones
         }
-        return practicas.get(lenguaje, "• Escribe código limpio y legible\n• Usa nombres descriptivos\n• Comenta cuando sea necesario\n• Prueba tu código\n• Sigue las convenciones del lenguaje")
     def analyze_with_ai(self, user_message):
         try:
             if not GROQ_AVAILABLE:
                 return {"success": False, "error": "Servicio AI no configurado. Por favor, configura GROQ_API_KEY en Render."}
-            lenguaje_detectado = self.detectar_lenguaje(user_message)
-            self.lenguaje_actual = lenguaje_detectado
-            system_prompt = f"Eres CyberCode AI, un experto asistente de programación especializado en {lenguaje_detectado if lenguaje_detectado != 'General' else 'múltiples lenguajes'}..."
-            messages = [{"role": "system", "content": system_prompt}]
-            for msg in self.get_conversation_context():
-                messages.append({"role": 'user' if msg['role'] == 'user' else 'assistant', "content": msg['content']})
-            messages.append({"role": "user", "content": user_message})
-            modelos = ["openai/gpt-oss-120b", "llama-3.3-70b-versatile", "llama-3.1-8b-instant"]
-            response = None
-            for modelo in modelos:
-                try:
-                    response = client.chat.completions.create(
-                        model=modelo,
-                        messages=messages,
-                        temperature=0.7,
-                        max_tokens=3000,
-                        timeout=45
-                    )
-                    app.logger.info(f"✅ Modelo {modelo} funcionando para {lenguaje_detectado}")
-                    break
-                except Exception as e:
-                    app.logger.warning(f"Modelo {modelo} falló: {e}")
-                    continue
-            if not response:
+            lenguaje_detectado, messages = self.preparar_mensajes(user_message)
+            try:
+                modelo, response = solicitar_completion(messages, temperature=0.7, max_tokens=3000)
+            except Exception:
                 return {"success": False, "error": "No se pudo conectar con ningún modelo AI"}
+            app.logger.info(f"✅ Modelo {modelo} funcionando para {lenguaje_detectado}")
             ai_response_raw = response.choices[0].message.content
             ai_response_mejorada = self.generar_respuesta_estructurada(user_message, ai_response_raw, lenguaje_detectado)
-            self.add_message('assistant', ai_response_mejorada)
-            engagement = min(10, len(user_message) / 10 + 2)
-            self.sistema_aprendizaje.evaluar_respuesta(lenguaje_detectado, user_message, ai_response_mejorada, engagement)
-            return {
-                "success": True,
-                "response": ai_response_mejorada,
-                "session_id": self.session_id,
-                "lenguaje": lenguaje_detectado,
-                "history_length": len(self.history),
-                "interacciones": self.contador_interacciones
-            }
+            return self.registrar_respuesta(user_message, ai_response_mejorada, lenguaje_detectado)
         except Exception as e:
             app.logger.error(f"Error en análisis: {str(e)}")
             return {"success": False, "error": f"Error en análisis: {str(e)}"}
+    def stream_with_ai(self, user_message):
+        try:
+            if not GROQ_AVAILABLE:
+                yield evento_sse({"success": False, "error": "Servicio AI no configurado. Por favor, configura GROQ_API_KEY en Render."})
+                return
+            lenguaje_detectado = self.detectar_lenguaje(user_message)
+            self.lenguaje_actual = lenguaje_detectado
+            # El análisis del código no depende del modelo: se envía antes del resumen y de la primera petición
+            encabezado = self.generar_encabezado(user_message, lenguaje_detectado)
+            yield evento_sse({"delta": encabezado})
+            messages = self.construir_mensajes(lenguaje_detectado)
+            partes = [encabezado]
+            try:
+                modelo, stream = solicitar_completion(messages, temperature=0.7, max_tokens=3000, stream=True)
+                for chunk in stream:
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        partes.append(delta)
+                        yield evento_sse({"delta": delta})
+            except Exception as e:
+                app.logger.warning(f"Stream interrumpido: {e}")
+                yield evento_sse({"success": False, "error": "No se pudo conectar con ningún modelo AI"})
+                return
+            app.logger.info(f"✅ Modelo {modelo} (stream) funcionando para {lenguaje_detectado}")
+            pie = self.generar_pie(lenguaje_detectado)
+            yield evento_sse({"delta": pie})
+            partes.append(pie)
+            resultado = self.registrar_respuesta(user_message, ''.join(partes), lenguaje_detectado)
+            resultado["done"] = True
+            yield evento_sse(resultado)
+        except Exception as e:
+            app.logger.error(f"Error en análisis: {str(e)}")
+            yield evento_sse({"success": False, "error": f"Error en análisis: {str(e)}"})
+
+class AlmacenSesiones:
+    def __init__(self, ttl, max_sesiones=10000):
+        # Orden de último acceso: las sesiones inactivas quedan al principio
+        self.sesiones = OrderedDict()
+        self.ttl = ttl
+        self.max_sesiones = max_sesiones
+        self.lock = threading.Lock()
+    def purgar_expiradas(self, ahora):
+        # Se llama con self.lock tomado
+        while self.sesiones:
+            _, (_, ultimo_acceso) = next(iter(self.sesiones.items()))
+            if ahora - ultimo_acceso < self.ttl:
+                break
+            self.sesiones.popitem(last=False)
+    def obtener(self, session_id):
+        if not session_id:
+            return None
+        ahora = time.monotonic()
+        with self.lock:
+            self.purgar_expiradas(ahora)
+            entrada = self.sesiones.get(session_id)
+            if entrada is None:
+                return None
+            self.sesiones[session_id] = (entrada[0], ahora)
+            self.sesiones.move_to_end(session_id)
+            return entrada[0]
+    def guardar(self, asistente):
+        ahora = time.monotonic()
+        with self.lock:
+            self.sesiones[asistente.session_id] = (asistente, ahora)
+            self.sesiones.move_to_end(asistente.session_id)
+            self.purgar_expiradas(ahora)
+            while len(self.sesiones) > self.max_sesiones:
+                self.sesiones.popitem(last=False)
+    def eliminar(self, session_id):
+        with self.lock:
+            self.sesiones.pop(session_id, None)
+    def crear(self):
+        asistente = CodeChatAssistant()
+        self.guardar(asistente)
+        return asistente
+
+class AlmacenSesionesRedis:
+    def __init__(self, cliente_redis, ttl, prefijo="chat_session:"):
+        self.redis = cliente_redis
+        self.ttl = ttl
+        self.prefijo = prefijo
+    def obtener(self, session_id):
+        if not session_id:
+            return None
+        datos = self.redis.get(self.prefijo + session_id)
+        if datos is None:
+            return None
+        return CodeChatAssistant.from_dict(orjson.loads(datos))
+    def guardar(self, asistente):
+        self.redis.set(self.prefijo + asistente.session_id, orjson.dumps(asistente.to_dict()), ex=self.ttl)
+    def eliminar(self, session_id):
+        if session_id:
+            self.redis.delete(self.prefijo + session_id)
+    def crear(self):
+        asistente = CodeChatAssistant()
+        self.guardar(asistente)
+        return asistente
+
+if os.getenv("REDIS_URL"):
+    almacen_sesiones = AlmacenSesionesRedis(redis.from_url(os.getenv("REDIS_URL")), ttl=app.config['PERMANENT_SESSION_LIFETIME'])
+    app.logger.info("🗄️ Sesiones de chat almacenadas en Redis")
+else:
+    almacen_sesiones = AlmacenSesiones(ttl=app.config['PERMANENT_SESSION_LIFETIME'])
+
+def obtener_asistente_sesion():
+    asistente = almacen_sesiones.obtener(session.get('sid'))
+    if asistente is None:
+        asistente = almacen_sesiones.crear()
+        session.permanent = True
+        session['sid'] = asistente.session_id
+    return asistente
+
+@lru_cache(maxsize=1)
+def pagina_principal():
+    return render_template('index.html')
 
 # --- RUTAS FLASK ---
 @app.route('/')
 def index():
-    session.permanent = True
-    if 'chat_session' not in session:
-        session['chat_session'] = CodeChatAssistant().to_dict()
+    chat_assistant = obtener_asistente_sesion()
     if 'RENDER' in os.environ:
-        app.logger.info(f"📱 Nueva sesión iniciada: {session.get('chat_session', {}).get('session_id', 'new')}")
-    return render_template('index.html')
+        app.logger.info(f"📱 Nueva sesión iniciada: {chat_assistant.session_id}")
+    if app.debug:
+        return render_template('index.html')
+    return pagina_principal()
+
+RESPUESTA_EN_CURSO = "Ya hay una respuesta en curso en esta conversación. Espera a que termine."
 
 @app.route('/chat', methods=['POST'])
 def chat():
     try:
-        user_message = request.json.get('message', '').strip()
-        if not user_message:
+        user_message = request.json.get('message') or ''
+        if not user_message or user_message.isspace():
             return jsonify({"success": False, "error": "El mensaje no puede estar vacío"})
-        if 'chat_session' not in session:
-            session['chat_session'] = CodeChatAssistant().to_dict()
-        chat_assistant = CodeChatAssistant.from_dict(session['chat_session'])
-        chat_assistant.add_message('user', user_message)
-        result = chat_assistant.analyze_with_ai(user_message)
-        session['chat_session'] = chat_assistant.to_dict()
-        session.modified = True
+        chat_assistant = obtener_asistente_sesion()
+        if not chat_assistant.lock.acquire(blocking=False):
+            return jsonify({"success": False, "error": RESPUESTA_EN_CURSO}), 409
+        try:
+            chat_assistant.add_message('user', user_message)
+            result = chat_assistant.analyze_with_ai(user_message)
+            almacen_sesiones.guardar(chat_assistant)
+        finally:
+            chat_assistant.lock.release()
         app.logger.info(f"💬 Chat interaction - Lenguaje: {chat_assistant.lenguaje_actual}, Messages: {chat_assistant.contador_interacciones}")
         return jsonify(result)
     except Exception as e:
         app.logger.error(f"Error en endpoint /chat: {str(e)}")
         return jsonify({"success": False, "error": str(e)})
 
+@app.route('/chat_stream', methods=['POST'])
+def chat_stream():
+    try:
+        user_message = request.json.get('message') or ''
+        if not user_message or user_message.isspace():
+            return jsonify({"success": False, "error": "El mensaje no puede estar vacío"})
+        chat_assistant = obtener_asistente_sesion()
+        if not chat_assistant.lock.acquire(blocking=False):
+            return jsonify({"success": False, "error": RESPUESTA_EN_CURSO}), 409
+        try:
+            chat_assistant.add_message('user', user_message)
+            app.logger.info(f"💬 Chat stream - Messages: {chat_assistant.contador_interacciones}")
+            def generar():
+                yield from chat_assistant.stream_with_ai(user_message)
+                almacen_sesiones.guardar(chat_assistant)
+            response = Response(
+                stream_with_context(generar()),
+                mimetype='text/event-stream',
+                headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+            )
+        except Exception:
+            chat_assistant.lock.release()
+            raise
+        # El turno termina cuando se cierra la respuesta, aunque el cliente se desconecte antes
+        response.call_on_close(chat_assistant.lock.release)
+        return response
+    except Exception as e:
+        app.logger.error(f"Error en endpoint /chat_stream: {str(e)}")
+        return jsonify({"success": False, "error": str(e)})
+
 @app.route('/new_chat', methods=['POST'])
 def new_chat():
     try:
-        session['chat_session'] = CodeChatAssistant().to_dict()
-        session.modified = True
+        almacen_sesiones.eliminar(session.get('sid'))
+        chat_assistant = almacen_sesiones.crear()
+        session['sid'] = chat_assistant.session_id
         app.logger.info("🆕 Nueva conversación iniciada")
         return jsonify({
             "success": True,
             "message": "Nueva conversación iniciada",
-            "session_id": session['chat_session']['session_id']
+            "session_id": chat_assistant.session_id
         })
     except Exception as e:
         app.logger.error(f"Error al crear nuevo chat: {str(e)}")
@@ -319,18 +809,24 @@ def new_chat():
 
 @app.route('/logo.png')
 def serve_logo():
-    return send_from_directory('static', 'logo.png')
+    response = send_from_directory('static', 'logo.png', max_age=86400, conditional=True)
+    response.cache_control.public = True
+    return response
+
+ENTORNO = os.getenv("FLASK_ENV", "production")
+EN_RENDER = 'RENDER' in os.environ
 
 @app.route('/health')
 def health():
     groq_status = "groq_connected" if GROQ_AVAILABLE else "groq_missing_key"
-    return jsonify({
+    estado = {
         "status": "cyber_ready",
         "ai": groq_status,
-        "environment": os.getenv("FLASK_ENV", "production"),
-        "render": 'RENDER' in os.environ,
-        "session_active": 'chat_session' in session
-    })
+        "environment": ENTORNO,
+        "render": EN_RENDER,
+        "session_active": 'sid' in session
+    }
+    return jsonify(estado)
 
 @app.route('/test')
 def test():
@@ -346,7 +842,7 @@ def not_found(error):
     app.logger.warning(f"404 Not Found: {request.url}")
     return jsonify({
         "error": "Endpoint no encontrado",
-        "available_routes": ["/", "/chat", "/new_chat", "/health", "/test", "/logo.png"]
+        "available_routes": ["/", "/chat", "/chat_stream", "/new_chat", "/health", "/test", "/logo.png"]
     }), 404
 
 @app.errorhandler(500)
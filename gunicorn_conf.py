@@ -0,0 +1,29 @@
+preload_app = True
+
+# Un solo proceso: el registro de aprendizaje (datos/aprendizaje.log + compactación)
+# y el almacén de sesiones en memoria son estado por proceso; con varios workers
+# cada uno compactaría su propia copia y se perderían datos.
+# Fija el valor para que WEB_CONCURRENCY no lo sobrescriba.
+workers = 1
+
+# gthread: cada petición (incluidas las de /chat_stream, que duran lo que dure la
+# generación) ocupa un hilo y no bloquea al worker completo.
+worker_class = "gthread"
+threads = 8
+
+# Por encima del peor caso del cliente Groq: 45s de timeout x 3 intentos
+# (max_retries=2) para el modelo preferido, más lo mismo para la carrera de respaldo.
+timeout = 300
+graceful_timeout = 30
+
+
+def when_ready(server):
+    import app as aplicacion
+    with aplicacion.app.app_context():
+        aplicacion.pagina_principal()
+
+
+def post_fork(server, worker):
+    import app as aplicacion
+    aplicacion.iniciar_worker()
+    server.log.info(f"Worker {worker.pid}: cliente Groq y logs inicializados")
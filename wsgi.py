@@ -1,4 +1 @@
 from app import app
-
-if __name__ == "__main__":
-    app.run()
\ No newline at end of file